@@ -1,161 +1,479 @@
-"""Audio processing and cutting module."""
-
-import numpy as np
-import soundfile as sf
-import librosa
-from pathlib import Path
-from typing import List, Tuple
-import warnings
-
-warnings.filterwarnings('ignore')
-
-
-class AudioProcessor:
-    """Processes audio and removes specified segments."""
-    
-    def __init__(self, sample_rate: int = 22050):
-        """Initialize audio processor.
-        
-        Args:
-            sample_rate: Sample rate for audio processing
-        """
-        self.sample_rate = sample_rate
-    
-    def load_audio(self, audio_path: Path) -> Tuple[np.ndarray, int]:
-        """Load audio file.
-        
-        Args:
-            audio_path: Path to audio file
-            
-        Returns:
-            Tuple of (audio data, sample rate)
-        """
-        y, sr = librosa.load(str(audio_path), sr=self.sample_rate)
-        return y, sr
-    
-    def cut_segments(self, audio: np.ndarray, 
-                    timestamps_to_remove: List[Tuple[float, float]],
-                    smooth_transition: float = 0.1) -> np.ndarray:
-        """Remove specified time segments from audio.
-        
-        Args:
-            audio: Audio data as numpy array
-            timestamps_to_remove: List of (start, end) timestamps to remove
-            smooth_transition: Seconds to fade in/out at transitions
-            
-        Returns:
-            Audio with segments removed
-        """
-        # Sort timestamps
-        timestamps_to_remove = sorted(timestamps_to_remove)
-        
-        # Create a mask for samples to keep
-        samples_to_keep = np.ones(len(audio), dtype=bool)
-        
-        # Convert timestamps to sample indices
-        for start_time, end_time in timestamps_to_remove:
-            start_sample = int(start_time * self.sample_rate)
-            end_sample = int(end_time * self.sample_rate)
-            
-            # Ensure indices are within bounds
-            start_sample = max(0, start_sample)
-            end_sample = min(len(audio), end_sample)
-            
-            # Apply smooth fade-out before cut
-            if smooth_transition > 0 and start_sample > 0:
-                fade_samples = int(smooth_transition * self.sample_rate)
-                fade_start = max(0, start_sample - fade_samples)
-                fade_array = np.linspace(1.0, 0.0, start_sample - fade_start)
-                audio[fade_start:start_sample] *= fade_array[:start_sample - fade_start]
-            
-            # Apply smooth fade-in after cut
-            if smooth_transition > 0 and end_sample < len(audio):
-                fade_samples = int(smooth_transition * self.sample_rate)
-                fade_end = min(len(audio), end_sample + fade_samples)
-                fade_array = np.linspace(0.0, 1.0, fade_end - end_sample)
-                audio[end_sample:fade_end] *= fade_array[:fade_end - end_sample]
-            
-            # Mark samples for removal
-            samples_to_keep[start_sample:end_sample] = False
-        
-        # Filter audio
-        processed_audio = audio[samples_to_keep]
-        
-        return processed_audio
-    
-    def save_audio(self, audio: np.ndarray, output_path: Path, 
-                   sample_rate: int = None):
-        """Save audio to file.
-        
-        Args:
-            audio: Audio data
-            output_path: Path to save audio
-            sample_rate: Sample rate (defaults to instance sample_rate)
-        """
-        if sample_rate is None:
-            sample_rate = self.sample_rate
-        
-        sf.write(str(output_path), audio, sample_rate)
-    
-    def normalize_audio(self, audio: np.ndarray) -> np.ndarray:
-        """Normalize audio levels.
-        
-        Args:
-            audio: Audio data
-            
-        Returns:
-            Normalized audio data
-        """
-        # Simple peak normalization
-        max_val = np.max(np.abs(audio))
-        if max_val > 0:
-            return audio / max_val
-        return audio
-    
-    def process_audio(self, audio_path: Path,
-                     timestamps_to_remove: List[Tuple[float, float]],
-                     output_path: Path,
-                     normalize: bool = True,
-                     smooth_transition: float = 0.1) -> Path:
-        """Complete audio processing pipeline.
-        
-        Args:
-            audio_path: Input audio file path
-            timestamps_to_remove: Segments to remove
-            output_path: Output file path
-            normalize: Whether to normalize audio
-            smooth_transition: Fade duration at cuts
-            
-        Returns:
-            Path to processed audio
-        """
-        # Load audio
-        print("Loading audio...")
-        audio, sr = self.load_audio(audio_path)
-        
-        print(f"Original duration: {len(audio) / sr:.2f} seconds")
-        
-        # Cut segments
-        print("Removing segments...")
-        processed_audio = self.cut_segments(audio, timestamps_to_remove, smooth_transition)
-        
-        print(f"New duration: {len(processed_audio) / sr:.2f} seconds")
-        print(f"Removed: {len(audio) / sr - len(processed_audio) / sr:.2f} seconds")
-        
-        # Normalize if requested
-        if normalize:
-            print("Normalizing audio...")
-            processed_audio = self.normalize_audio(processed_audio)
-        
-        # Save
-        print(f"Saving to {output_path}...")
-        
-        # Ensure output directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        self.save_audio(processed_audio, output_path, sr)
-        
-        print(f"Successfully saved {len(processed_audio) / sr / 60:.2f} minutes of audio")
-        
-        return output_path
-
+"""Audio processing and cutting module."""
+
+import numpy as np
+import os
+import soundfile as sf
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+import warnings
+
+warnings.filterwarnings('ignore')
+
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+# Frames per block when streaming audio through the cut pipeline
+_BLOCK_SIZE = 1 << 20
+
+# One cached fade ramp: (length, ramp_up, ramp_down). The fade length is
+# constant within a run of the pipeline, so this avoids re-allocating
+# identical linspace arrays for every segment
+_ramp_cache = (0, None, None)
+
+
+def _fade_ramps(fade_samples):
+    """Get cached float32 (fade_in, fade_out) ramps of the given length.
+
+    fade_out is a reversed view of fade_in; callers slice views from both
+    and must not write to them.
+    """
+    global _ramp_cache
+    if _ramp_cache[0] != fade_samples:
+        ramp_up = np.linspace(0.0, 1.0, fade_samples, dtype=np.float32)
+        _ramp_cache = (fade_samples, ramp_up, ramp_up[::-1])
+    return _ramp_cache[1], _ramp_cache[2]
+
+
+def _apply_fades_numpy(out, run_starts, run_ends, fade_samples,
+                       fade_first_head, fade_last_tail):
+    """NumPy fallback for :func:`_apply_fades` when numba is unavailable."""
+    fade_in, fade_out = _fade_ramps(fade_samples)
+    num_runs = len(run_starts)
+
+    # All fade lengths in one branch-free pass: a run fades in at its head
+    # when a cut precedes it and out at its tail when a cut follows it
+    head_lens = np.minimum(fade_samples, run_ends - run_starts)
+    tail_lens = head_lens.copy()
+    if not fade_first_head:
+        head_lens[0] = 0
+    if not fade_last_tail:
+        tail_lens[-1] = 0
+
+    for i in range(num_runs):
+        lo = run_starts[i]
+        hi = run_ends[i]
+
+        head = head_lens[i]
+        if head:
+            np.multiply(out[lo:lo + head], fade_in[:head],
+                        out=out[lo:lo + head])
+
+        tail = tail_lens[i]
+        if tail:
+            np.multiply(out[hi - tail:hi], fade_out[fade_samples - tail:],
+                        out=out[hi - tail:hi])
+
+
+if _HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _apply_fades(out, run_starts, run_ends, fade_samples,
+                     fade_first_head, fade_last_tail):
+        """Fade the head and tail of each kept run in place.
+
+        The ramp values are computed inline so the whole pass compiles to a
+        single fused loop, parallelized across runs.
+        """
+        denom = fade_samples - 1 if fade_samples > 1 else 1
+        num_runs = len(run_starts)
+
+        for i in prange(num_runs):
+            lo = run_starts[i]
+            hi = run_ends[i]
+            length = hi - lo
+
+            # Fade-in at the head of the run: gain rises from 0 at the cut
+            if i > 0 or fade_first_head:
+                head = min(fade_samples, length)
+                for k in range(head):
+                    out[lo + k] *= k / denom
+
+            # Fade-out at the tail of the run: gain falls to 0 at the cut
+            if i < num_runs - 1 or fade_last_tail:
+                tail = min(fade_samples, length)
+                for k in range(tail):
+                    out[hi - tail + k] *= 1.0 - (fade_samples - tail + k) / denom
+else:
+    _apply_fades = _apply_fades_numpy
+
+
+class _FfmpegMp3Writer:
+    """Streams raw float32 PCM into an ffmpeg-spawned LAME encoder.
+
+    Encoding through LAME directly avoids libsndfile's slower MP3 path and
+    any intermediate staging file; blocks are piped as they are produced.
+    """
+
+    def __init__(self, output_path: Path, sample_rate: int,
+                 bitrate: str = '192k'):
+        self._proc = subprocess.Popen(
+            ['ffmpeg', '-y', '-loglevel', 'error',
+             '-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', '-i', '-',
+             '-c:a', 'libmp3lame', '-b:a', bitrate, str(output_path)],
+            stdin=subprocess.PIPE)
+
+    def write(self, block: np.ndarray):
+        self._proc.stdin.write(
+            np.ascontiguousarray(block, dtype=np.float32).tobytes())
+
+    def close(self):
+        self._proc.stdin.close()
+        if self._proc.wait() != 0:
+            raise RuntimeError("ffmpeg MP3 encoding failed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._proc.kill()
+
+
+def _open_writer(output_path: Path, sample_rate: int):
+    """Open a streaming mono writer for the output path.
+
+    MP3 goes through an ffmpeg/LAME pipe when ffmpeg is on PATH; any other
+    format (or a missing ffmpeg) uses soundfile directly.
+    """
+    if output_path.suffix.lower() == '.mp3':
+        try:
+            return _FfmpegMp3Writer(output_path, sample_rate)
+        except FileNotFoundError:
+            pass  # no ffmpeg installed; let libsndfile handle it
+    return sf.SoundFile(str(output_path), 'w', samplerate=sample_rate,
+                        channels=1)
+
+
+class AudioProcessor:
+    """Processes audio and removes specified segments."""
+    
+    def __init__(self, sample_rate: int = 22050):
+        """Initialize audio processor.
+        
+        Args:
+            sample_rate: Advisory sample rate, used as the default when a
+                method is not told the rate of the audio it is given.
+                Files are processed at their native rate; nothing is
+                resampled.
+        """
+        self.sample_rate = sample_rate
+    
+    def load_audio(self, audio_path: Path) -> Tuple[np.ndarray, int]:
+        """Load audio file at its native sample rate.
+
+        Args:
+            audio_path: Path to audio file
+
+        Returns:
+            Tuple of (mono audio data, sample rate)
+        """
+        y, sr = sf.read(str(audio_path), dtype='float32', always_2d=True)
+        if y.shape[1] > 1:
+            y = y.mean(axis=1, dtype=np.float32)
+        else:
+            y = y[:, 0]
+        return y, sr
+    
+    @staticmethod
+    def _to_sample_intervals(timestamps: List[Tuple[float, float]],
+                             sample_rate: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert (start, end) second timestamps to sorted, clipped sample indices.
+
+        Args:
+            timestamps: List of (start, end) timestamps in seconds
+            sample_rate: Sample rate to convert with
+            n: Total number of samples (indices are clipped to [0, n])
+
+        Returns:
+            Tuple of (starts, ends) int64 arrays
+        """
+        intervals = np.asarray(timestamps, dtype=np.float64)
+        samples = np.clip(np.rint(intervals * sample_rate).astype(np.int64), 0, n)
+        samples = samples[np.argsort(samples[:, 0], kind='stable')]
+        return samples[:, 0], samples[:, 1]
+
+    @staticmethod
+    def _keep_runs(starts: np.ndarray, ends: np.ndarray,
+                   n: int, gap: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Complement the removal intervals on [0, n] into runs of kept samples.
+
+        Args:
+            starts: Sorted removal interval start samples
+            ends: Removal interval end samples
+            n: Total number of samples
+            gap: Merge removal intervals separated by at most this many
+                kept samples. Passing the combined fade length here drops
+                slivers too short to fade out and back in cleanly.
+
+        Returns:
+            Tuple of (keep_starts, keep_ends) arrays of non-empty kept runs
+        """
+        # Union overlapping (or nearly adjacent, within gap) removal
+        # intervals; starts are already sorted, so a new run begins
+        # wherever a start lies past the running max end
+        run_ends = np.maximum.accumulate(ends)
+        new_run = np.empty(len(starts), dtype=bool)
+        new_run[0] = True
+        new_run[1:] = starts[1:] > run_ends[:-1] + gap
+        run_first = np.flatnonzero(new_run)
+        removed_starts = starts[run_first]
+        removed_ends = run_ends[np.append(run_first[1:] - 1, len(run_ends) - 1)]
+
+        # Complement on [0, n] gives the contiguous runs of samples to keep
+        keep_starts = np.append(0, removed_ends)
+        keep_ends = np.append(removed_starts, n)
+        nonempty = keep_starts < keep_ends
+        return keep_starts[nonempty], keep_ends[nonempty]
+
+    def cut_segments(self, audio: np.ndarray,
+                    timestamps_to_remove: List[Tuple[float, float]],
+                    smooth_transition: float = 0.1,
+                    sample_rate: int = None) -> np.ndarray:
+        """Remove specified time segments from audio.
+
+        Args:
+            audio: Audio data as numpy array
+            timestamps_to_remove: List of (start, end) timestamps to remove
+            smooth_transition: Seconds to fade in/out at transitions
+            sample_rate: Sample rate of the audio (defaults to instance
+                sample_rate)
+
+        Returns:
+            Audio with segments removed
+        """
+        if not timestamps_to_remove:
+            return audio
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+
+        n = len(audio)
+        fade_samples = int(smooth_transition * sample_rate)
+        starts, ends = self._to_sample_intervals(timestamps_to_remove, sample_rate, n)
+        # Cuts separated by less than a fade-out plus fade-in are merged:
+        # the sliver between them could never reach full level anyway
+        keep_starts, keep_ends = self._keep_runs(starts, ends, n,
+                                                 gap=2 * fade_samples)
+        if len(keep_starts) == 0:
+            return audio[:0]
+
+        # Copy the kept runs into a fresh output buffer; the source buffer
+        # is never written to, so it may be read-only or memory-mapped
+        lengths = keep_ends - keep_starts
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        processed_audio = np.empty(offsets[-1], dtype=audio.dtype)
+        for i in range(len(keep_starts)):
+            np.copyto(processed_audio[offsets[i]:offsets[i + 1]],
+                      audio[keep_starts[i]:keep_ends[i]])
+
+        # Fade the run boundaries of the output in one compiled pass
+        if fade_samples > 0:
+            _apply_fades(processed_audio, offsets[:-1], offsets[1:],
+                         fade_samples,
+                         bool(keep_starts[0] > 0), bool(keep_ends[-1] < n))
+
+        return processed_audio
+    
+    def save_audio(self, audio: np.ndarray, output_path: Path,
+                   sample_rate: int = None, subtype: str = None):
+        """Save audio to file.
+
+        Args:
+            audio: Audio data
+            output_path: Path to save audio
+            sample_rate: Sample rate (defaults to instance sample_rate)
+            subtype: Explicit libsndfile subtype; defaults to PCM_16 for
+                WAV/FLAC so float64 storage is never picked implicitly
+        """
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+
+        if output_path.suffix.lower() == '.mp3':
+            with _open_writer(output_path, sample_rate) as outfile:
+                outfile.write(audio)
+            return
+
+        if subtype is None and output_path.suffix.lower() in ('.wav', '.flac'):
+            subtype = 'PCM_16'
+
+        sf.write(str(output_path), audio, sample_rate, subtype=subtype)
+    
+    def normalize_audio(self, audio: np.ndarray) -> np.ndarray:
+        """Normalize audio levels.
+        
+        Args:
+            audio: Audio data
+            
+        Returns:
+            Normalized audio data
+        """
+        # Simple peak normalization; the float32 scalar keeps the divide
+        # from silently upcasting the whole buffer to float64
+        max_val = np.max(np.abs(audio))
+        if max_val > 0:
+            return audio * np.float32(1.0 / max_val)
+        return audio
+    
+    def _iter_cut_blocks(self, infile: 'sf.SoundFile',
+                         keep_starts: np.ndarray, keep_ends: np.ndarray,
+                         fade_samples: int):
+        """Stream the kept runs of an open sound file as processed blocks.
+
+        Reads each kept run in blocks of at most ``_BLOCK_SIZE`` frames,
+        downmixes to mono and applies the boundary fades, yielding float32
+        blocks whose concatenation is the cut audio at the source rate.
+
+        Args:
+            infile: Open soundfile.SoundFile to read from
+            keep_starts: Start samples of the kept runs
+            keep_ends: End samples of the kept runs
+            fade_samples: Fade length at cut boundaries, in samples
+        """
+        n = infile.frames
+        if len(keep_starts) == 0:
+            return
+        if fade_samples > 0:
+            fade_in, fade_out = _fade_ramps(fade_samples)
+
+        # Fade lengths for every run up front: a run fades in at its head
+        # if a cut precedes it, and out at its tail if a cut follows it
+        run_lengths = keep_ends - keep_starts
+        head_lens = np.minimum(fade_samples, run_lengths)
+        tail_lens = head_lens.copy()
+        if keep_starts[0] == 0:
+            head_lens[0] = 0
+        if keep_ends[-1] >= n:
+            tail_lens[-1] = 0
+
+        for i, (run_start, run_end) in enumerate(zip(keep_starts, keep_ends)):
+            run_length = int(run_lengths[i])
+            head_len = int(head_lens[i])
+            tail_len = int(tail_lens[i])
+
+            infile.seek(int(run_start))
+            offset = 0
+            while offset < run_length:
+                count = min(_BLOCK_SIZE, run_length - offset)
+                block = infile.read(count, dtype='float32', always_2d=True)
+                if block.shape[1] > 1:
+                    block = block.mean(axis=1)
+                else:
+                    block = block[:, 0]
+
+                # Fade-in over the head of the run
+                if offset < head_len:
+                    lo = offset
+                    hi = min(offset + count, head_len)
+                    block[:hi - lo] *= fade_in[lo:hi]
+
+                # Fade-out over the tail of the run
+                tail_start = run_length - tail_len
+                if offset + count > tail_start:
+                    lo = max(offset, tail_start)
+                    hi = offset + count
+                    ramp_lo = fade_samples - tail_len + (lo - tail_start)
+                    block[lo - offset:] *= fade_out[ramp_lo:ramp_lo + (hi - lo)]
+
+                yield block
+                offset += count
+
+    def process_audio(self, audio_path: Path,
+                     timestamps_to_remove: List[Tuple[float, float]],
+                     output_path: Path,
+                     normalize: bool = True,
+                     smooth_transition: float = 0.1) -> Path:
+        """Complete audio processing pipeline.
+
+        Streams the input in blocks instead of decoding the whole file, so
+        memory use stays bounded regardless of podcast length.
+
+        Args:
+            audio_path: Input audio file path
+            timestamps_to_remove: Segments to remove
+            output_path: Output file path
+            normalize: Whether to normalize audio
+            smooth_transition: Fade duration at cuts
+
+        Returns:
+            Path to processed audio
+        """
+        info = sf.info(str(audio_path))
+        src_sr = info.samplerate
+
+        n = info.frames
+        print(f"Original duration: {n / src_sr:.2f} seconds")
+
+        # Everything runs at the file's native rate: cut indices and fades
+        # are computed at src_sr and the output keeps it
+        fade_samples = int(smooth_transition * src_sr)
+        if timestamps_to_remove:
+            starts, ends = self._to_sample_intervals(timestamps_to_remove, src_sr, n)
+            keep_starts, keep_ends = self._keep_runs(starts, ends, n,
+                                                     gap=2 * fade_samples)
+        else:
+            keep_starts = np.array([0], dtype=np.int64)
+            keep_ends = np.array([n], dtype=np.int64)
+
+        kept = int(np.sum(keep_ends - keep_starts))
+        print(f"New duration: {kept / src_sr:.2f} seconds")
+        print(f"Removed: {(n - kept) / src_sr:.2f} seconds")
+
+        # Normalization needs the global peak before anything is written.
+        # Rather than decoding the file twice, stage the cut audio in a
+        # memmap-backed scratch file: the OS pages it in and out, so
+        # resident memory stays bounded even for multi-hour podcasts
+        scale = 1.0
+        scratch = None
+        scratch_path = None
+        try:
+            if normalize and kept > 0:
+                print("Normalizing audio...")
+                scratch_fd, scratch_path = tempfile.mkstemp(suffix='.f32')
+                os.close(scratch_fd)
+                scratch = np.memmap(scratch_path, dtype=np.float32,
+                                    mode='w+', shape=(kept,))
+                peak = 0.0
+                pos = 0
+                with sf.SoundFile(str(audio_path)) as infile:
+                    for block in self._iter_cut_blocks(infile, keep_starts,
+                                                       keep_ends, fade_samples):
+                        if block.size:
+                            peak = max(peak, float(np.max(np.abs(block))))
+                            scratch[pos:pos + len(block)] = block
+                            pos += len(block)
+                if peak > 0:
+                    scale = 1.0 / peak
+
+            print(f"Saving to {output_path}...")
+
+            # Ensure output directory exists
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with _open_writer(output_path, src_sr) as outfile:
+                if scratch is not None:
+                    # Replay the staged audio, scaling block-wise
+                    for offset in range(0, kept, _BLOCK_SIZE):
+                        block = scratch[offset:offset + _BLOCK_SIZE]
+                        if scale != 1.0:
+                            block = block * np.float32(scale)
+                        outfile.write(block)
+                else:
+                    with sf.SoundFile(str(audio_path)) as infile:
+                        for block in self._iter_cut_blocks(infile, keep_starts,
+                                                           keep_ends, fade_samples):
+                            if block.size:
+                                outfile.write(block)
+        finally:
+            if scratch is not None:
+                del scratch
+            if scratch_path is not None:
+                os.remove(scratch_path)
+
+        print(f"Successfully saved {kept / src_sr / 60:.2f} minutes of audio")
+
+        return output_path
@@ -2,6 +2,7 @@
 
 import click
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 import os
@@ -76,6 +77,10 @@ def main(input_source: str, config: str, output: Optional[str], hf_token: Option
     # Check if processing local file or downloading from URL
     # Auto-detect: if it's not a URL, treat as file path
     is_local_file = file or (not input_source.startswith('http://') and not input_source.startswith('https://'))
+
+    diarizer = SpeakerDiarizer(hf_token=token)
+    model_future = None
+    executor = None
     
     if is_local_file:
         # Process local audio file
@@ -89,7 +94,6 @@ def main(input_source: str, config: str, output: Optional[str], hf_token: Option
         
         # Get file metadata
         import soundfile as sf
-        import librosa
         info = sf.info(str(audio_path))
         duration_seconds = info.frames / info.samplerate
         video_info = {
@@ -114,16 +118,25 @@ def main(input_source: str, config: str, output: Optional[str], hf_token: Option
             click.echo(f"File already exists: {expected_path}")
             audio_path = expected_path
         else:
+            # The model load (~30s cold) is network/disk bound just like
+            # the download, so run it in the background while we download
+            executor = ThreadPoolExecutor(max_workers=1)
+            model_future = executor.submit(diarizer._load_model)
+
             click.echo("Downloading audio...")
             audio_path = downloader.download_audio(input_source, filename=output)
             click.echo(f"Downloaded to: {audio_path}\n")
-    
+
     # Identify interviewer segments
     click.echo("\n" + "="*60)
     click.echo("STEP 2: Identifying speakers")
     click.echo("="*60)
-    diarizer = SpeakerDiarizer(hf_token=token)
-    
+
+    if model_future is not None:
+        # Surface any model-load error here, in the main thread
+        model_future.result()
+        executor.shutdown()
+
     detection_method = cfg['speaker'].get('detection_method', 'duration')
     num_speakers = cfg['speaker'].get('num_speakers', 2)
     
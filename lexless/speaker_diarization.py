@@ -1,16 +1,19 @@
 """Speaker diarization module to identify who is speaking."""
 
+import hashlib
 import numpy as np
 from pathlib import Path
 from typing import List, Tuple, Optional
 import torch
 from pyannote.core import Segment
-import librosa
 import warnings
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
+# Diarization results are cached here, keyed by audio content hash
+_CACHE_DIR = Path.home() / ".cache" / "lexless"
+
 
 class SpeakerDiarizer:
     """Identifies and separates different speakers in audio."""
@@ -23,7 +26,18 @@ class SpeakerDiarizer:
         """
         self.hf_token = hf_token
         self.inference = None
-        
+        self._device = None
+
+        # Structure-of-arrays view of the last diarization, built once in
+        # diarize() so the numeric methods avoid Python-level iteration
+        self._segments = None
+        self._starts = None
+        self._ends = None
+        self._speaker_codes = None
+        self._speaker_labels = None
+        self._speaker_order = None
+        self._sorted_codes = None
+
         # Don't initialize model here - load it lazily when needed
         # This avoids loading the model if user just wants to check the CLI
     
@@ -63,7 +77,17 @@ class SpeakerDiarizer:
                     )
                 else:
                     pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization@2.1")
-                
+
+                # Run on GPU when available; the segmentation model's conv
+                # shapes are fixed, so let cudnn autotune its kernels
+                self._device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+                if self._device.type == 'cuda':
+                    pipeline.to(self._device)
+                    torch.backends.cudnn.benchmark = True
+                    print("Running diarization on GPU")
+                else:
+                    self._quantize_segmentation(pipeline)
+
                 self.inference = pipeline
                 print("Model loaded successfully!")
             except Exception as e:
@@ -90,6 +114,73 @@ class SpeakerDiarizer:
                     "5. Try setting your token with: --hf-token YOUR_TOKEN"
                 )
     
+    @staticmethod
+    def _quantize_segmentation(pipeline):
+        """Dynamically quantize the segmentation model for CPU inference.
+
+        The segmentation network is dominated by LSTM and Linear layers,
+        whose int8 dynamic-quantized kernels are several times faster on
+        CPU with negligible effect on speech/non-speech decisions. GPU
+        runs keep the FP16 path instead.
+
+        Args:
+            pipeline: Loaded pyannote diarization pipeline
+        """
+        try:
+            segmentation = getattr(pipeline, '_segmentation', None)
+            model = getattr(segmentation, 'model', None)
+            if model is None:
+                return
+            segmentation.model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+            print("Quantized segmentation model to int8 for CPU inference")
+        except Exception:
+            pass  # keep the FP32 model if quantization is unsupported here
+
+    def _prepare_audio_input(self, audio_path: Path) -> dict:
+        """Build the pipeline input dict for an audio file.
+
+        On GPU runs the waveform is decoded once into pinned host memory,
+        so the pipeline's per-chunk host-to-device copies go over DMA and
+        can overlap with inference instead of staging through pageable
+        memory.
+
+        Args:
+            audio_path: Path to audio file
+
+        Returns:
+            Input mapping for the pyannote pipeline
+        """
+        if self._device is not None and self._device.type == 'cuda':
+            try:
+                import torchaudio
+                waveform, sample_rate = torchaudio.load(str(audio_path))
+                return {"uri": str(audio_path),
+                        "waveform": waveform.pin_memory(),
+                        "sample_rate": sample_rate}
+            except Exception:
+                pass  # fall back to letting the pipeline decode from disk
+
+        return {"uri": str(audio_path), "audio": str(audio_path)}
+
+    def _run_inference(self, audio_file: dict, hook=None):
+        """Run the diarization pipeline, under FP16 autocast on GPU.
+
+        Args:
+            audio_file: Pipeline input from _prepare_audio_input
+            hook: Optional pyannote progress hook
+
+        Returns:
+            Diarization annotation
+        """
+        kwargs = {} if hook is None else {'hook': hook}
+        if self._device is not None and self._device.type == 'cuda':
+            # FP16 inference halves memory traffic on GPU with no
+            # meaningful accuracy cost for segmentation/embedding
+            with torch.autocast('cuda', dtype=torch.float16):
+                return self.inference(audio_file, **kwargs)
+        return self.inference(audio_file, **kwargs)
+
     def diarize(self, audio_path: Path, num_speakers: int = 2) -> List[Tuple[Segment, str]]:
         """Identify which segments belong to which speaker.
         
@@ -102,51 +193,31 @@ class SpeakerDiarizer:
         """
         # Load model if not already loaded
         self._load_model()
-        
-        # Get audio duration for progress estimation
+
+        # Print the audio duration so the user knows what they're in for
         try:
             import soundfile as sf
             info = sf.info(str(audio_path))
             duration = info.frames / info.samplerate
-            est_time = duration * 2  # Rough estimate: 2 min per audio minute
             print(f"Audio duration: {duration/60:.2f} minutes")
-            print(f"Estimated processing time: {est_time/60:.1f} minutes")
-            print("Starting speaker diarization...\n")
         except Exception:
-            print("Starting speaker diarization...\n")
-            est_time = None
-        
-        # Add a progress indicator thread
-        import threading
-        import time
-        progress_active = threading.Event()
-        progress_active.set()
-        
-        def show_progress():
-            elapsed = 0
-            dots = 0
-            while progress_active.is_set():
-                time.sleep(5)
-                elapsed += 5
-                dots = (dots + 1) % 4
-                dot_str = "." * dots + " " * (3 - dots)
-                if est_time:
-                    progress_pct = min(100, int((elapsed / est_time) * 100))
-                    print(f"Processing{dot_str} ({elapsed//60}m {elapsed%60}s elapsed, ~{progress_pct}%)", end='\r')
-                else:
-                    print(f"Processing{dot_str} ({elapsed//60}m {elapsed%60}s elapsed)", end='\r')
-        
-        progress_thread = threading.Thread(target=show_progress, daemon=True)
-        progress_thread.start()
-        
+            pass
+        print("Starting speaker diarization...\n")
+
+        # Progress comes from pyannote's own hook, fired from inside the
+        # inference loop, rather than a polling thread
         try:
-            # Perform diarization
-            # Pipeline expects {"uri": "path", "audio": "path"}
-            diarization = self.inference({"uri": str(audio_path), "audio": str(audio_path)})
-        finally:
-            progress_active.clear()
-            print()  # New line after progress
-        
+            from pyannote.audio.pipelines.utils.hook import ProgressHook
+        except ImportError:
+            ProgressHook = None
+
+        audio_file = self._prepare_audio_input(audio_path)
+        if ProgressHook is not None:
+            with ProgressHook() as hook:
+                diarization = self._run_inference(audio_file, hook=hook)
+        else:
+            diarization = self._run_inference(audio_file)
+
         print("Diarization complete! Processing results...")
         
         # Convert to list of tuples
@@ -155,20 +226,120 @@ class SpeakerDiarizer:
             segments.append((turn, speaker))
         
         print(f"Found {len(segments)} speech segments")
+        self._build_segment_arrays(segments)
         return segments
-    
-    def get_speaker_segments(self, segments: List[Tuple[Segment, str]], 
+
+    def _build_segment_arrays(self, segments: List[Tuple[Segment, str]]):
+        """Build and cache a structure-of-arrays view of the segments.
+
+        Args:
+            segments: List of (segment, speaker_id) tuples
+        """
+        count = len(segments)
+        self._segments = segments
+        self._starts = np.fromiter((seg.start for seg, _ in segments),
+                                   dtype=np.float64, count=count)
+        self._ends = np.fromiter((seg.end for seg, _ in segments),
+                                 dtype=np.float64, count=count)
+
+        # Int-encode speaker labels so per-speaker reductions are bincounts;
+        # np.unique does the dedup and encoding in one C-level pass
+        unique_labels, codes = np.unique(
+            np.array([speaker for _, speaker in segments]),
+            return_inverse=True)
+        self._speaker_labels = unique_labels.tolist()
+        self._speaker_codes = codes.astype(np.int64, copy=False)
+
+        # Stable order by speaker: each speaker's segments then form one
+        # contiguous range, found in O(log N) with searchsorted
+        self._speaker_order = np.argsort(self._speaker_codes, kind='stable')
+        self._sorted_codes = self._speaker_codes[self._speaker_order]
+
+    @staticmethod
+    def _audio_cache_key(audio_path: Path) -> str:
+        """Content hash of an audio file, read in streamed chunks.
+
+        Args:
+            audio_path: Path to audio file
+
+        Returns:
+            Hex digest identifying the file contents
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(audio_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load_cached_diarization(self, cache_key: str) -> Optional[List[Tuple[Segment, str]]]:
+        """Load cached diarization results for a content hash, if present.
+
+        Args:
+            cache_key: Content hash from _audio_cache_key
+
+        Returns:
+            List of (segment, speaker_id) tuples, or None on cache miss
+        """
+        cache_path = _CACHE_DIR / f"{cache_key}.npz"
+        try:
+            if not cache_path.exists():
+                return None
+            data = np.load(str(cache_path), allow_pickle=False)
+            return [(Segment(float(start), float(end)), str(speaker))
+                    for start, end, speaker
+                    in zip(data['starts'], data['ends'], data['speakers'])]
+        except Exception:
+            # A corrupt or unreadable cache entry just means a re-run
+            return None
+
+    def _store_cached_diarization(self, cache_key: str,
+                                  segments: List[Tuple[Segment, str]]):
+        """Store diarization results on disk for later runs.
+
+        Args:
+            cache_key: Content hash from _audio_cache_key
+            segments: List of (segment, speaker_id) tuples
+        """
+        try:
+            _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            np.savez(str(_CACHE_DIR / f"{cache_key}.npz"),
+                     starts=np.array([seg.start for seg, _ in segments]),
+                     ends=np.array([seg.end for seg, _ in segments]),
+                     speakers=np.array([speaker for _, speaker in segments]))
+        except Exception:
+            pass  # Caching is best-effort
+
+    def _segment_arrays(self, segments: List[Tuple[Segment, str]]):
+        """Get the SoA view for segments, rebuilding the cache if stale.
+
+        Args:
+            segments: List of (segment, speaker_id) tuples
+
+        Returns:
+            Tuple of (starts, ends, speaker_codes, speaker_labels)
+        """
+        if segments is not self._segments:
+            self._build_segment_arrays(segments)
+        return self._starts, self._ends, self._speaker_codes, self._speaker_labels
+
+    def get_speaker_segments(self, segments: List[Tuple[Segment, str]],
                            speaker_id: str) -> List[Segment]:
         """Get all segments for a specific speaker.
-        
+
         Args:
             segments: List of (segment, speaker_id) tuples
             speaker_id: Speaker identifier (e.g., "SPEAKER_00")
-            
+
         Returns:
             List of segments for the specified speaker
         """
-        return [seg for seg, speaker in segments if speaker == speaker_id]
+        _, _, _, labels = self._segment_arrays(segments)
+        if speaker_id not in labels:
+            return []
+        code = labels.index(speaker_id)
+        lo = np.searchsorted(self._sorted_codes, code, side='left')
+        hi = np.searchsorted(self._sorted_codes, code, side='right')
+        return [segments[i][0] for i in self._speaker_order[lo:hi]]
     
     def identify_interviewer(self, segments: List[Tuple[Segment, str]], 
                             method: str = "duration") -> str:
@@ -184,28 +355,21 @@ class SpeakerDiarizer:
         """
         if not segments:
             return ""
-        
-        # Get unique speakers
-        speakers = list(set(speaker for _, speaker in segments))
-        
-        if len(speakers) <= 1:
-            return speakers[0] if speakers else ""
-        
+
+        starts, ends, codes, labels = self._segment_arrays(segments)
+
+        if len(labels) <= 1:
+            return labels[0] if labels else ""
+
         if method == "first":
             # First speaker is usually the interviewer
             return segments[0][1]
-        
+
         elif method == "duration":
-            # Calculate total speaking time for each speaker
-            speaker_duration = {}
-            for segment, speaker in segments:
-                if speaker not in speaker_duration:
-                    speaker_duration[speaker] = 0
-                speaker_duration[speaker] += segment.duration
-            
+            # Total speaking time per speaker in one C-level reduction
             # Usually the interviewer talks less than the guest
-            # Return the speaker with less total duration
-            return min(speaker_duration.items(), key=lambda x: x[1])[0]
+            durations = np.bincount(codes, weights=ends - starts)
+            return labels[int(np.argmin(durations))]
         
         elif method == "manual":
             # Manual selection - would prompt user
@@ -229,9 +393,23 @@ class SpeakerDiarizer:
         Returns:
             List of (start_time, end_time) tuples to remove
         """
-        # Perform diarization
-        segments = self.diarize(audio_path, num_speakers)
-        
+        # Check the on-disk cache first: a hit skips both the diarization
+        # run and the model load entirely
+        try:
+            cache_key = self._audio_cache_key(audio_path)
+        except OSError:
+            cache_key = None
+
+        segments = self._load_cached_diarization(cache_key) if cache_key else None
+        if segments is not None:
+            print(f"Using cached diarization results ({len(segments)} segments)")
+            self._build_segment_arrays(segments)
+        else:
+            # Perform diarization
+            segments = self.diarize(audio_path, num_speakers)
+            if cache_key:
+                self._store_cached_diarization(cache_key, segments)
+
         # Identify which speaker to remove
         if target_speaker is None:
             interviewer_id = self.identify_interviewer(segments, detection_method)